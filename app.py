@@ -3,31 +3,316 @@ FastAPI web application for GIF creation from video uploads.
 This is the web-based version of the live.py desktop application.
 """
 
+import asyncio
+import functools
+import gzip
+import hashlib
 import os
+import re
+import secrets
+import shutil
+import stat
 import subprocess
-import uuid
+import time
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+import aiofiles
+import orjson
+from fastapi import BackgroundTasks, FastAPI, File, Form, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response
+from fastapi.staticfiles import StaticFiles
+
+try:
+    import brotli
+except ImportError:  # Optional: the index page is then served gzip-only
+    brotli = None
 
-# Create directories for uploads and output
 BASE_DIR = Path(__file__).resolve().parent
-UPLOAD_DIR = BASE_DIR / "uploads"
-OUTPUT_DIR = BASE_DIR / "output"
-UPLOAD_DIR.mkdir(exist_ok=True)
-OUTPUT_DIR.mkdir(exist_ok=True)
+STATIC_DIR = BASE_DIR / "static"
+
+# Maximum upload size in bytes, 100MB unless GIF_MAX_UPLOAD says otherwise
+MAX_FILE_SIZE = int(os.environ.get("GIF_MAX_UPLOAD", 100 * 1024 * 1024))
+_FILE_TOO_LARGE = f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
+# Allowance for the multipart boundaries and form fields around the file
+_MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _scratch_dir(env_var: str, name: str) -> Path:
+    """
+    Pick the directory for short-lived upload/output files.
+    
+    An explicit ``env_var`` wins. Otherwise tmpfs at /dev/shm is used when it
+    is writable and has room for a few maximum-size uploads (Docker's default
+    64MB /dev/shm does not), so intermediates never reach the disk; failing
+    that the files live next to the app.
+    """
+    if env_var in os.environ:
+        return Path(os.environ[env_var])
+    shm = Path("/dev/shm")
+    try:
+        if os.access(shm, os.W_OK) and shutil.disk_usage(shm).free >= 4 * MAX_FILE_SIZE:
+            return shm / "gifmaker" / name
+    except OSError:
+        pass
+    return BASE_DIR / name
+
+
+# Create directories for uploads and output
+UPLOAD_DIR = _scratch_dir("GIF_UPLOAD_DIR", "uploads")
+OUTPUT_DIR = _scratch_dir("GIF_OUTPUT_DIR", "output")
+UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+
+# Behind nginx, set GIF_ACCEL_REDIRECT to an internal location that aliases
+# OUTPUT_DIR (e.g. "/internal/gifs/") and downloads are handed to nginx via
+# X-Accel-Redirect, so it sends the file from the kernel instead of Python
+ACCEL_REDIRECT_PREFIX = os.environ.get("GIF_ACCEL_REDIRECT")
+
+# Uploads and GIFs older than this many seconds (GIF_FILE_TTL, default 30
+# minutes) are deleted by the background sweeper, which runs every
+# _SWEEP_INTERVAL seconds
+FILE_TTL = int(os.environ.get("GIF_FILE_TTL", 30 * 60))
+_SWEEP_INTERVAL = 60
+
+# Plain string prefixes for the per-request paths, built once so requests
+# don't construct and stringify Path objects
+_UPLOAD_PREFIX = str(UPLOAD_DIR) + os.sep
+_OUTPUT_PREFIX = str(OUTPUT_DIR) + os.sep
+
+# Uploads are copied to disk in 1 MiB chunks so a request never holds the
+# whole video in memory
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Job ids are 8-byte blake2b digests in hex; these accept exactly such ids
+# and the GIF names built from them
+_JOB_ID = re.compile(r"[0-9a-f]{16}")
+_GIF_NAME = re.compile(r"output_[0-9a-f]{16}\.gif")
+
+ALLOWED_EXTENSIONS = frozenset({'.mp4', '.avi', '.mov', '.webm', '.mkv', '.m4v'})
+_ALLOWED_EXTENSIONS_LIST = ', '.join(sorted(ALLOWED_EXTENSIONS))
+
+
+# At most FFMPEG_CONCURRENCY conversions run at once per worker, each capped
+# at FFMPEG_THREADS threads, so together they roughly fill the CPUs instead of
+# every FFmpeg process spawning a thread per core
+_CPU_COUNT = os.cpu_count() or 4
+# Uvicorn takes its worker count from WEB_CONCURRENCY; the budget is per worker
+_WORKERS = int(os.environ.get("WEB_CONCURRENCY", 1))
+FFMPEG_CONCURRENCY = int(os.environ.get("GIF_FFMPEG_CONCURRENCY", max(1, _CPU_COUNT // 2 // _WORKERS)))
+FFMPEG_THREADS = int(os.environ.get("GIF_FFMPEG_THREADS", max(1, _CPU_COUNT // _WORKERS // FFMPEG_CONCURRENCY)))
+_ffmpeg_slots = asyncio.Semaphore(FFMPEG_CONCURRENCY)
+# Past this many running or queued jobs per worker, new conversions get 429
+# and a Retry-After instead of an ever longer queue
+MAX_PENDING_JOBS = int(os.environ.get("GIF_MAX_PENDING_JOBS", 4 * FFMPEG_CONCURRENCY))
+_RETRY_AFTER = "10"
+_pending_jobs = 0
+# Each FFmpeg or gifsicle run is killed after _TOOL_TIMEOUT seconds. A live
+# job touches its .part marker every _PART_HEARTBEAT seconds, so a marker
+# older than the timeout was left by a worker that died mid-job
+_TOOL_TIMEOUT = 120
+_PART_HEARTBEAT = 30
+
+
+# Render node used for VAAPI (Intel/AMD) decode and scaling
+VAAPI_DEVICE = os.environ.get("GIF_VAAPI_DEVICE", "/dev/dri/renderD128")
+
+# hwaccel -> (-init_hw_device spec, scale filter) for the startup probe,
+# in order of preference
+_HWACCEL_PROBES = {
+    'cuda': ('cuda=gpu', 'scale_cuda=32:32'),
+    'vaapi': (f'vaapi=gpu:{VAAPI_DEVICE}', 'scale_vaapi=w=32:h=32'),
+}
+
+
+def _probe_hwaccel() -> str | None:
+    """
+    Detect a usable GPU decode + scale path for FFmpeg.
+    
+    Distro builds list ``cuda`` and ``vaapi`` under ``-hwaccels`` whether or
+    not a GPU is present, so a tiny upload/scale/download graph is run to
+    confirm the device and its scale filter actually work. Set GIF_HWACCEL
+    to ``cuda`` or ``vaapi`` to only try that one, or to ``none`` to skip
+    the probe.
+    
+    Returns:
+        "cuda" or "vaapi" when available, otherwise None
+    """
+    wanted = os.environ.get("GIF_HWACCEL", "auto")
+    if wanted == "none":
+        return None
+    try:
+        listed = subprocess.run(
+            ['ffmpeg', '-hide_banner', '-hwaccels'],
+            stdin=subprocess.DEVNULL,
+            capture_output=True,
+            timeout=10
+        ).stdout.decode('ascii', errors='ignore').split()
+        for hwaccel, (device, scale) in _HWACCEL_PROBES.items():
+            if hwaccel not in listed or wanted not in ("auto", hwaccel):
+                continue
+            probe = subprocess.run(
+                [
+                    'ffmpeg', '-v', 'error',
+                    '-init_hw_device', device, '-filter_hw_device', 'gpu',
+                    '-f', 'lavfi', '-i', 'color=black:size=64x64',
+                    '-vf', f'format=nv12,hwupload,{scale},hwdownload,format=nv12',
+                    '-frames:v', '1', '-f', 'null', '-'
+                ],
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                timeout=30
+            )
+            if probe.returncode == 0:
+                return hwaccel
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    return None
+
+
+# Probed once per worker process at import time
+FFMPEG_HWACCEL = _probe_hwaccel()
+
+# Input options that decode on the GPU and keep the frames there
+_HWACCEL_INPUT_ARGS = {
+    'cuda': ['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda'],
+    'vaapi': [
+        '-hwaccel', 'vaapi', '-hwaccel_device', VAAPI_DEVICE,
+        '-hwaccel_output_format', 'vaapi'
+    ],
+}
+
+# When gifsicle is installed, finished GIFs are re-packed with it (frame
+# differencing plus lossy LZW), which typically halves the download
+GIFSICLE = shutil.which("gifsicle")
+
+# Hashed into every job id along with the video and settings: GPU and CPU
+# decodes, and GIFs with or without the gifsicle pass, differ in their bytes
+_PIPELINE_KEY = f"{FFMPEG_HWACCEL or 'cpu'}:{'gifsicle' if GIFSICLE else 'ffmpeg'}"
+
+def _sweep_stale_files() -> None:
+    """Delete files in UPLOAD_DIR and OUTPUT_DIR last modified over FILE_TTL ago."""
+    cutoff = time.time() - FILE_TTL
+    for directory in (UPLOAD_DIR, OUTPUT_DIR):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                except OSError:
+                    pass
+
+
+async def _sweeper() -> None:
+    """Run _sweep_stale_files off the event loop every _SWEEP_INTERVAL seconds."""
+    while True:
+        await asyncio.to_thread(_sweep_stale_files)
+        await asyncio.sleep(_SWEEP_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keep the stale-file sweeper running for the lifetime of the app."""
+    sweeper = asyncio.create_task(_sweeper())
+    try:
+        yield
+    finally:
+        sweeper.cancel()
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+    
+    FastAPI's own ORJSONResponse is deprecated in current releases, and
+    this is all it did.
+    """
+    
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
 
 app = FastAPI(
     title="GIF Maker Live - Web",
     description="Convert video files to GIFs via web interface",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=OrjsonResponse
 )
 
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject POST bodies whose declared Content-Length is over the upload limit.
+    
+    FastAPI parses the whole multipart form before a handler or dependency
+    runs, so this has to happen in middleware to refuse an oversized upload
+    before it is received. Chunked uploads without a Content-Length are
+    still capped while they are copied in /api/convert.
+    """
+    
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_body_size:
+                        response = JSONResponse(status_code=413, content={"detail": _FILE_TOO_LARGE})
+                        await response(scope, receive, send)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(UploadSizeLimitMiddleware, max_body_size=MAX_FILE_SIZE + _MULTIPART_OVERHEAD)
+
+
+# For URLs whose content can never change: hashed assets and GIF downloads,
+# whose names hash the video, the settings and the conversion pipeline, so a
+# re-upload after the sweeper ran recreates the same bytes under the same name
+_CACHE_FOREVER = 'public, max-age=31536000, immutable'
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles that lets browsers cache content-hashed URLs forever.
+    
+    Requests carrying a ``?v=<hash>`` query (see _static_url) can never go
+    stale; anything else keeps Starlette's ETag/Last-Modified revalidation.
+    """
+    
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if scope['query_string'].startswith(b'v='):
+            response.headers['Cache-Control'] = _CACHE_FOREVER
+        return response
+
+
+class GifFileResponse(FileResponse):
+    """FileResponse that reads in 1 MiB chunks instead of Starlette's 64 KiB."""
+    
+    chunk_size = 1024 * 1024
+
+
+app.mount("/static", CachedStaticFiles(directory=STATIC_DIR), name="static")
+
+# The JSON/download API is a sub-application under /api so only it runs
+# through CORS; the page and its assets are always fetched same-origin
+api = FastAPI(
+    title="GIF Maker Live - API",
+    version="1.0.0",
+    default_response_class=OrjsonResponse
+)
+app.mount("/api", api)
+
 # Add CORS middleware for broader compatibility
 # Note: In production, replace "*" with specific allowed origins
-app.add_middleware(
+api.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=False,  # Disabled for wildcard origins
@@ -36,7 +321,90 @@ app.add_middleware(
 )
 
 
-def convert_video_to_gif(
+@functools.lru_cache(maxsize=32)
+def _gif_filter(fps: int, width: int, hwaccel: str | None = None) -> str:
+    """
+    Build the single-pass GIF filtergraph.
+    
+    The scaled frames are split so palettegen and paletteuse share one
+    decode: the first branch builds a 128-colour palette, the second maps
+    every frame onto it. With ``hwaccel="cuda"`` the frames stay on the GPU
+    for scaling and only the small scaled frames are downloaded; likewise
+    for ``hwaccel="vaapi"``. Cached, since nearly every request uses the
+    page's default fps and width.
+    """
+    if hwaccel == 'cuda':
+        scale = f'scale_cuda={width}:-2:interp_algo=lanczos,hwdownload,format=nv12'
+    elif hwaccel == 'vaapi':
+        scale = f'scale_vaapi=w={width}:h=-2:format=nv12,hwdownload,format=nv12'
+    else:
+        scale = f'scale={width}:-1:flags=lanczos'
+    # palettegen and paletteuse both take packed BGRA; converting once ahead
+    # of the split lets the two branches share the frames instead of each
+    # leg getting its own auto-inserted conversion
+    return (
+        f'[0:v]fps={fps},{scale},format=bgra,split[a][b];'
+        '[a]palettegen=max_colors=128:stats_mode=diff:reserve_transparent=0[p];'
+        '[b][p]paletteuse=dither=bayer:bayer_scale=5'
+    )
+
+
+class _ToolTimeout(HTTPException):
+    """Raised when an external tool runs past its time limit."""
+
+
+async def _run_tool(cmd: list[str], what: str = "FFmpeg") -> None:
+    """
+    Run an FFmpeg or gifsicle command without blocking the event loop.
+    
+    Waits for one of the FFMPEG_CONCURRENCY slots before spawning.
+    
+    Args:
+        cmd: Argument list, starting with the program
+        what: Name of the tool, used in error messages
+    """
+    async with _ffmpeg_slots:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"{what} error: {str(e)}"
+            )
+        
+        try:
+            _, stderr = await asyncio.wait_for(
+                proc.communicate(),
+                timeout=_TOOL_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise _ToolTimeout(
+                status_code=500,
+                detail=f"{what} timed out"
+            )
+        except BaseException:
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
+            raise
+        
+        if proc.returncode != 0:
+            # The error is at the end; the banner and stream dump before it
+            # can run to megabytes and are not worth decoding or returning
+            raise HTTPException(
+                status_code=500,
+                detail=f"{what} error: {stderr[-4096:].decode('utf-8', errors='replace')}"
+            )
+
+
+async def convert_video_to_gif(
     video_path: str,
     output_path: str,
     fps: int = 10,
@@ -47,1108 +415,219 @@ def convert_video_to_gif(
     
     Args:
         video_path: Path to the input video file
-        output_path: Path for the output GIF file
+        output_path: Path for the output GIF file (any extension)
         fps: Frames per second for the GIF
         width: Width of the output GIF (height auto-calculated)
     
     Returns:
         Path to the created GIF file
     """
-    try:
-        # Use FFmpeg subprocess to convert video to GIF
+    if FFMPEG_HWACCEL is not None:
         cmd = [
             'ffmpeg',
             '-y',  # Overwrite output
+            '-threads', str(FFMPEG_THREADS),
+            *_HWACCEL_INPUT_ARGS[FFMPEG_HWACCEL],
             '-i', video_path,
-            '-vf', f'fps={fps},scale={width}:-1:flags=lanczos',
+            '-filter_complex', _gif_filter(fps, width, hwaccel=FFMPEG_HWACCEL),
             '-loop', '0',
+            '-f', 'gif',
             output_path
         ]
-        result = subprocess.run(
-            cmd,
-            stdin=subprocess.DEVNULL,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            timeout=120  # 2 minute timeout
-        )
-        if result.returncode != 0:
-            raise Exception(f"FFmpeg error: {result.stderr.decode('utf-8', errors='ignore')}")
-        return output_path
-    except subprocess.TimeoutExpired:
-        raise HTTPException(
-            status_code=500,
-            detail="Video conversion timed out"
-        )
+        try:
+            await _run_tool(cmd)
+            return output_path
+        except _ToolTimeout:
+            # A timeout would only repeat on the CPU
+            raise
+        except HTTPException:
+            # Inputs the GPU can't decode fall back to the CPU path below
+            pass
+    
+    cmd = [
+        'ffmpeg',
+        '-y',  # Overwrite output
+        '-threads', str(FFMPEG_THREADS),
+        '-i', video_path,
+        '-filter_complex', _gif_filter(fps, width),
+        '-loop', '0',
+        '-f', 'gif',
+        output_path
+    ]
+    await _run_tool(cmd)
+    return output_path
+
+
+async def _optimize_gif(path: str) -> None:
+    """
+    Shrink a finished GIF in place with gifsicle, if it is installed.
+    
+    Best effort: if gifsicle fails or times out the ffmpeg output is kept.
+    It takes an FFmpeg slot like the conversion, being the same kind of
+    CPU-bound work.
+    """
+    if GIFSICLE is None:
+        return
+    tmp_path = path + '.opt'
+    try:
+        await _run_tool([GIFSICLE, '-O3', '--lossy=80', '-o', tmp_path, path], what="gifsicle")
+        os.replace(tmp_path, path)
     except HTTPException:
-        raise
+        _safe_unlink(tmp_path)
+
+
+def _claim_job(part_path: str) -> bool:
+    """
+    Create a job's ``.part`` marker, unless a live job already holds it.
+    
+    O_EXCL makes this the claim on the job, so of several identical uploads,
+    across workers too, one converts. A stale marker is removed and the
+    claim retried once.
+    
+    Returns:
+        True if the caller now owns the job and should convert
+    """
+    for _ in range(2):
+        try:
+            os.close(os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL))
+            return True
+        except FileExistsError:
+            try:
+                age = time.time() - os.stat(part_path).st_mtime
+            except FileNotFoundError:
+                return False  # That job just finished or failed
+            if age < _TOOL_TIMEOUT:
+                return False
+            _safe_unlink(part_path)
+    return False
+
+
+async def _keep_alive(part_path: str) -> None:
+    """Touch a job's ``.part`` marker every _PART_HEARTBEAT seconds until cancelled."""
+    while True:
+        await asyncio.sleep(_PART_HEARTBEAT)
+        try:
+            os.utime(part_path)
+        except FileNotFoundError:
+            return
+
+
+async def _run_job(video_path: str, gif_path: str, fps: int, width: int) -> None:
+    """
+    Convert an uploaded video in the background and record the outcome.
+    
+    Job state lives in OUTPUT_DIR so every worker process can answer
+    /api/jobs polls: ``<gif>.part`` while converting, ``<gif>`` when done, and
+    ``<gif>.err`` holding the error message if the conversion failed.
+    """
+    global _pending_jobs
+    part_path = gif_path + '.part'
+    heartbeat = asyncio.create_task(_keep_alive(part_path))
+    try:
+        await convert_video_to_gif(video_path, part_path, fps=fps, width=width)
+        await _optimize_gif(part_path)
+        os.replace(part_path, gif_path)
     except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"FFmpeg error: {str(e)}"
-        )
+        detail = e.detail if isinstance(e, HTTPException) else f"Conversion failed: {str(e)}"
+        # Written before the .part marker goes away so a poll never sees
+        # the job vanish
+        with open(gif_path + '.err', 'w', encoding='utf-8') as f:
+            f.write(detail)
+        _safe_unlink(part_path)
+    finally:
+        heartbeat.cancel()
+        _pending_jobs -= 1
+        _safe_unlink(video_path)
+
+
+async def _upload_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    """Yield the upload in UPLOAD_CHUNK_SIZE pieces, enforcing MAX_FILE_SIZE."""
+    total = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        total += len(chunk)
+        if total > MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail=_FILE_TOO_LARGE)
+        yield chunk
+
+
+def _safe_unlink(path: str) -> None:
+    """Remove a file, ignoring errors such as it never having been created."""
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+# (threshold, unit) pairs, largest first
+_SIZE_UNITS = ((1 << 30, 'GB'), (1 << 20, 'MB'), (1 << 10, 'KB'))
+
+
+def _format_size(size: int) -> str:
+    """Format a byte count the way /api/convert reports it, e.g. "1.5 MB"."""
+    for threshold, unit in _SIZE_UNITS:
+        if size >= threshold:
+            return f"{size / threshold:.1f} {unit}"
+    return f"{size} bytes"
+
+
+# Main page, read, encoded and hashed once at import rather than per request
+INDEX_HTML = (STATIC_DIR / "index.html").read_text(encoding="utf-8")
+
+
+def _static_url(name: str) -> str:
+    """URL for a file in STATIC_DIR, versioned by its content hash."""
+    digest = hashlib.blake2b((STATIC_DIR / name).read_bytes(), digest_size=6).hexdigest()
+    return f"/static/{name}?v={digest}"
+
+
+# Point the page at the current asset versions so they can be cached forever
+for _asset in ('app.css', 'app.js'):
+    INDEX_HTML = INDEX_HTML.replace(f'"/static/{_asset}"', f'"{_static_url(_asset)}"')
+_INDEX_BYTES = INDEX_HTML.encode('utf-8')
+_INDEX_HASH = hashlib.blake2b(_INDEX_BYTES, digest_size=8).hexdigest()
+
+
+def _index_variant(encoding: str, body: bytes) -> tuple[bytes, dict[str, str]]:
+    """Pair a (possibly compressed) index body with its response headers."""
+    headers = {
+        # Each encoding is a distinct representation, so it gets its own ETag
+        'ETag': f'"{_INDEX_HASH}"' if encoding == 'identity' else f'"{_INDEX_HASH}-{encoding}"',
+        # Revalidated on every load so a deploy is picked up immediately; an
+        # unchanged page costs only a 304
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding',
+    }
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return body, headers
+
+
+# Compressed once here instead of by middleware on every request
+_INDEX_VARIANTS = {
+    'identity': _index_variant('identity', _INDEX_BYTES),
+    'gzip': _index_variant('gzip', gzip.compress(_INDEX_BYTES, 9)),
+}
+if brotli is not None:
+    _INDEX_VARIANTS['br'] = _index_variant('br', brotli.compress(_INDEX_BYTES, quality=11))
 
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """Serve the main HTML page."""
-    html_content = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>GIF Maker Live - Web</title>
-    <style>
-        * {
-            box-sizing: border-box;
-            margin: 0;
-            padding: 0;
-        }
-        
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }
-        
-        .container {
-            max-width: 700px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 16px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            padding: 40px;
-        }
-        
-        h1 {
-            text-align: center;
-            color: #333;
-            margin-bottom: 30px;
-            font-size: 2rem;
-        }
-        
-        /* Tab navigation */
-        .tab-nav {
-            display: flex;
-            margin-bottom: 25px;
-            border-radius: 8px;
-            overflow: hidden;
-            border: 2px solid #667eea;
-        }
-        
-        .tab-btn {
-            flex: 1;
-            padding: 12px;
-            border: none;
-            background: white;
-            cursor: pointer;
-            font-weight: 600;
-            font-size: 14px;
-            color: #667eea;
-            transition: all 0.3s ease;
-        }
-        
-        .tab-btn.active {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-        }
-        
-        .tab-btn:hover:not(.active) {
-            background: #f0f0ff;
-        }
-        
-        .tab-content {
-            display: none;
-        }
-        
-        .tab-content.active {
-            display: block;
-        }
-        
-        /* Camera section styles */
-        .camera-container {
-            position: relative;
-            margin-bottom: 20px;
-            background: #000;
-            border-radius: 12px;
-            overflow: hidden;
-            min-height: 300px;
-        }
-        
-        #cameraPreview {
-            width: 100%;
-            display: block;
-            border-radius: 12px;
-        }
-        
-        .camera-placeholder {
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            justify-content: center;
-            min-height: 300px;
-            color: white;
-            text-align: center;
-            padding: 20px;
-        }
-        
-        .camera-placeholder-icon {
-            font-size: 48px;
-            margin-bottom: 15px;
-        }
-        
-        .recording-indicator {
-            position: absolute;
-            top: 15px;
-            left: 15px;
-            display: flex;
-            align-items: center;
-            gap: 8px;
-            background: rgba(244, 67, 54, 0.9);
-            color: white;
-            padding: 8px 15px;
-            border-radius: 20px;
-            font-weight: 600;
-            font-size: 14px;
-            opacity: 0;
-            transition: opacity 0.3s ease;
-        }
-        
-        .recording-indicator.active {
-            opacity: 1;
-        }
-        
-        .recording-dot {
-            width: 10px;
-            height: 10px;
-            background: white;
-            border-radius: 50%;
-            animation: pulse 1s infinite;
-        }
-        
-        @keyframes pulse {
-            0%, 100% { opacity: 1; }
-            50% { opacity: 0.5; }
-        }
-        
-        .camera-controls {
-            display: flex;
-            gap: 10px;
-            margin-bottom: 20px;
-        }
-        
-        .camera-select-container {
-            flex: 1;
-        }
-        
-        .camera-select-container select {
-            width: 100%;
-            padding: 10px;
-            border: 2px solid #ddd;
-            border-radius: 8px;
-            font-size: 14px;
-            background: white;
-            cursor: pointer;
-        }
-        
-        .camera-select-container select:focus {
-            outline: none;
-            border-color: #667eea;
-        }
-        
-        .btn-start-camera {
-            padding: 10px 20px;
-            background: #667eea;
-            color: white;
-            border: none;
-            border-radius: 8px;
-            cursor: pointer;
-            font-weight: 600;
-            transition: all 0.3s ease;
-        }
-        
-        .btn-start-camera:hover {
-            background: #5a6fd6;
-        }
-        
-        .btn-record {
-            width: 100%;
-            padding: 15px;
-            border: none;
-            border-radius: 8px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            background: #f44336;
-            color: white;
-            margin-bottom: 15px;
-        }
-        
-        .btn-record:hover:not(:disabled) {
-            background: #d32f2f;
-            transform: translateY(-2px);
-        }
-        
-        .btn-record.recording {
-            background: #ff9800;
-        }
-        
-        .btn-record.recording:hover {
-            background: #f57c00;
-        }
-        
-        .btn-record:disabled {
-            opacity: 0.6;
-            cursor: not-allowed;
-            transform: none;
-        }
-        
-        .recording-stats {
-            display: flex;
-            justify-content: space-between;
-            padding: 12px;
-            background: #f5f5f5;
-            border-radius: 8px;
-            margin-bottom: 20px;
-            font-size: 14px;
-        }
-        
-        .stat-item {
-            text-align: center;
-        }
-        
-        .stat-label {
-            color: #666;
-            font-size: 12px;
-        }
-        
-        .stat-value {
-            font-weight: 600;
-            color: #333;
-            font-size: 16px;
-        }
-        
-        /* Upload area styles */
-        .upload-area {
-            border: 3px dashed #ddd;
-            border-radius: 12px;
-            padding: 40px;
-            text-align: center;
-            cursor: pointer;
-            transition: all 0.3s ease;
-            margin-bottom: 20px;
-            background: #fafafa;
-        }
-        
-        .upload-area:hover {
-            border-color: #667eea;
-            background: #f0f0ff;
-        }
-        
-        .upload-area.dragover {
-            border-color: #667eea;
-            background: #e8e8ff;
-        }
-        
-        .upload-icon {
-            font-size: 48px;
-            margin-bottom: 15px;
-        }
-        
-        .upload-text {
-            color: #666;
-            font-size: 16px;
-        }
-        
-        #fileInput {
-            display: none;
-        }
-        
-        .file-info {
-            margin-bottom: 20px;
-            padding: 10px;
-            background: #f5f5f5;
-            border-radius: 8px;
-            font-size: 14px;
-            color: #666;
-        }
-        
-        /* Common settings styles */
-        .settings-group {
-            margin-bottom: 20px;
-        }
-        
-        .settings-group label {
-            display: block;
-            margin-bottom: 8px;
-            font-weight: 600;
-            color: #444;
-        }
-        
-        .slider-container {
-            display: flex;
-            align-items: center;
-            gap: 15px;
-        }
-        
-        input[type="range"] {
-            flex: 1;
-            height: 8px;
-            border-radius: 4px;
-            background: #ddd;
-            outline: none;
-            -webkit-appearance: none;
-        }
-        
-        input[type="range"]::-webkit-slider-thumb {
-            -webkit-appearance: none;
-            width: 20px;
-            height: 20px;
-            border-radius: 50%;
-            background: #667eea;
-            cursor: pointer;
-        }
-        
-        .slider-value {
-            min-width: 50px;
-            text-align: right;
-            font-weight: 600;
-            color: #667eea;
-        }
-        
-        .btn {
-            width: 100%;
-            padding: 15px;
-            border: none;
-            border-radius: 8px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: all 0.3s ease;
-        }
-        
-        .btn-primary {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-        }
-        
-        .btn-primary:hover:not(:disabled) {
-            transform: translateY(-2px);
-            box-shadow: 0 5px 20px rgba(102, 126, 234, 0.4);
-        }
-        
-        .btn-primary:disabled {
-            opacity: 0.6;
-            cursor: not-allowed;
-        }
-        
-        .status {
-            margin-top: 20px;
-            padding: 15px;
-            border-radius: 8px;
-            text-align: center;
-            display: none;
-        }
-        
-        .status.info {
-            background: #e3f2fd;
-            color: #1976d2;
-            display: block;
-        }
-        
-        .status.success {
-            background: #e8f5e9;
-            color: #388e3c;
-            display: block;
-        }
-        
-        .status.error {
-            background: #ffebee;
-            color: #d32f2f;
-            display: block;
-        }
-        
-        .preview-container {
-            margin-top: 20px;
-            text-align: center;
-        }
-        
-        .preview-container img {
-            max-width: 100%;
-            border-radius: 8px;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.1);
-        }
-        
-        .download-btn {
-            margin-top: 15px;
-            background: #4CAF50;
-            color: white;
-        }
-        
-        .download-btn:hover {
-            background: #45a049;
-        }
-        
-        .progress-bar {
-            width: 100%;
-            height: 8px;
-            background: #ddd;
-            border-radius: 4px;
-            margin-top: 10px;
-            overflow: hidden;
-        }
-        
-        .progress-fill {
-            height: 100%;
-            background: linear-gradient(90deg, #667eea, #764ba2);
-            width: 0%;
-            transition: width 0.3s ease;
-        }
-        
-        /* Responsive */
-        @media (max-width: 600px) {
-            .container {
-                padding: 20px;
-            }
-            
-            h1 {
-                font-size: 1.5rem;
-            }
-            
-            .camera-controls {
-                flex-direction: column;
-            }
-            
-            .recording-stats {
-                flex-wrap: wrap;
-                gap: 10px;
-            }
-            
-            .stat-item {
-                flex: 1;
-                min-width: 80px;
-            }
-        }
-    </style>
-</head>
-<body>
-    <div class="container">
-        <h1>🎬 GIF Maker Live</h1>
-        
-        <!-- Tab Navigation -->
-        <div class="tab-nav">
-            <button class="tab-btn active" data-tab="camera">📹 Live Camera</button>
-            <button class="tab-btn" data-tab="upload">📁 Upload Video</button>
-        </div>
-        
-        <!-- Camera Tab -->
-        <div id="cameraTab" class="tab-content active">
-            <div class="camera-container" id="cameraContainer">
-                <video id="cameraPreview" autoplay playsinline muted></video>
-                <div class="camera-placeholder" id="cameraPlaceholder">
-                    <div class="camera-placeholder-icon">📷</div>
-                    <p>Click "Start Camera" to begin</p>
-                    <p><small>Camera access required</small></p>
-                </div>
-                <div class="recording-indicator" id="recordingIndicator">
-                    <div class="recording-dot"></div>
-                    <span>REC</span>
-                </div>
-            </div>
-            
-            <div class="camera-controls">
-                <div class="camera-select-container">
-                    <select id="cameraSelect">
-                        <option value="">Select camera...</option>
-                    </select>
-                </div>
-                <button class="btn-start-camera" id="startCameraBtn">Start Camera</button>
-            </div>
-            
-            <button class="btn-record" id="recordBtn" disabled>🔴 Start Recording</button>
-            
-            <div class="recording-stats">
-                <div class="stat-item">
-                    <div class="stat-label">Duration</div>
-                    <div class="stat-value" id="recordingDuration">0:00</div>
-                </div>
-                <div class="stat-item">
-                    <div class="stat-label">Frames</div>
-                    <div class="stat-value" id="frameCount">0</div>
-                </div>
-                <div class="stat-item">
-                    <div class="stat-label">Max Frames</div>
-                    <div class="stat-value" id="maxFramesDisplay">150</div>
-                </div>
-            </div>
-            
-            <div class="settings-group">
-                <label>Frame Rate (FPS)</label>
-                <div class="slider-container">
-                    <input type="range" id="cameraFpsSlider" min="1" max="30" value="8">
-                    <span class="slider-value" id="cameraFpsValue">8</span>
-                </div>
-            </div>
-            
-            <div class="settings-group">
-                <label>Width (pixels)</label>
-                <div class="slider-container">
-                    <input type="range" id="cameraWidthSlider" min="100" max="800" value="320">
-                    <span class="slider-value" id="cameraWidthValue">320</span>
-                </div>
-            </div>
-            
-            <div class="settings-group">
-                <label>Max Frames</label>
-                <div class="slider-container">
-                    <input type="range" id="maxFramesSlider" min="30" max="300" value="150">
-                    <span class="slider-value" id="maxFramesValue">150</span>
-                </div>
-            </div>
-            
-            <button class="btn btn-primary" id="createGifBtn" disabled>Create GIF</button>
-            
-            <div class="status" id="cameraStatus"></div>
-            
-            <div class="progress-bar" id="cameraProgressBar" style="display: none;">
-                <div class="progress-fill" id="cameraProgressFill"></div>
-            </div>
-            
-            <div class="preview-container" id="cameraPreviewContainer" style="display: none;">
-                <img id="cameraGifPreview" src="" alt="Generated GIF">
-                <a id="cameraDownloadLink" href="" download>
-                    <button class="btn download-btn">⬇️ Download GIF</button>
-                </a>
-            </div>
-        </div>
-        
-        <!-- Upload Tab -->
-        <div id="uploadTab" class="tab-content">
-            <div class="upload-area" id="uploadArea">
-                <div class="upload-icon">📁</div>
-                <div class="upload-text">
-                    <strong>Click to upload</strong> or drag and drop<br>
-                    <small>MP4, AVI, MOV, WebM supported</small>
-                </div>
-                <input type="file" id="fileInput" accept="video/*">
-            </div>
-            
-            <div class="file-info" id="fileInfo" style="display: none;">
-                Selected: <span id="fileName"></span>
-            </div>
-            
-            <div class="settings-group">
-                <label>Frame Rate (FPS)</label>
-                <div class="slider-container">
-                    <input type="range" id="fpsSlider" min="1" max="30" value="10">
-                    <span class="slider-value" id="fpsValue">10</span>
-                </div>
-            </div>
-            
-            <div class="settings-group">
-                <label>Width (pixels)</label>
-                <div class="slider-container">
-                    <input type="range" id="widthSlider" min="100" max="800" value="320">
-                    <span class="slider-value" id="widthValue">320</span>
-                </div>
-            </div>
-            
-            <button class="btn btn-primary" id="convertBtn" disabled>
-                Convert to GIF
-            </button>
-            
-            <div class="status" id="status"></div>
-            
-            <div class="progress-bar" id="progressBar" style="display: none;">
-                <div class="progress-fill" id="progressFill"></div>
-            </div>
-            
-            <div class="preview-container" id="previewContainer" style="display: none;">
-                <img id="gifPreview" src="" alt="Generated GIF">
-                <a id="downloadLink" href="" download>
-                    <button class="btn download-btn">⬇️ Download GIF</button>
-                </a>
-            </div>
-        </div>
-    </div>
-
-    <script>
-        // Tab Navigation
-        const tabBtns = document.querySelectorAll('.tab-btn');
-        const tabContents = document.querySelectorAll('.tab-content');
-        
-        tabBtns.forEach(btn => {
-            btn.addEventListener('click', () => {
-                const tabId = btn.dataset.tab;
-                
-                tabBtns.forEach(b => b.classList.remove('active'));
-                tabContents.forEach(c => c.classList.remove('active'));
-                
-                btn.classList.add('active');
-                document.getElementById(tabId + 'Tab').classList.add('active');
-            });
-        });
-        
-        // ============ CAMERA TAB ============
-        const cameraPreview = document.getElementById('cameraPreview');
-        const cameraPlaceholder = document.getElementById('cameraPlaceholder');
-        const cameraSelect = document.getElementById('cameraSelect');
-        const startCameraBtn = document.getElementById('startCameraBtn');
-        const recordBtn = document.getElementById('recordBtn');
-        const recordingIndicator = document.getElementById('recordingIndicator');
-        const recordingDuration = document.getElementById('recordingDuration');
-        const frameCount = document.getElementById('frameCount');
-        const maxFramesDisplay = document.getElementById('maxFramesDisplay');
-        const cameraFpsSlider = document.getElementById('cameraFpsSlider');
-        const cameraFpsValue = document.getElementById('cameraFpsValue');
-        const cameraWidthSlider = document.getElementById('cameraWidthSlider');
-        const cameraWidthValue = document.getElementById('cameraWidthValue');
-        const maxFramesSlider = document.getElementById('maxFramesSlider');
-        const maxFramesValue = document.getElementById('maxFramesValue');
-        const createGifBtn = document.getElementById('createGifBtn');
-        const cameraStatus = document.getElementById('cameraStatus');
-        const cameraProgressBar = document.getElementById('cameraProgressBar');
-        const cameraProgressFill = document.getElementById('cameraProgressFill');
-        const cameraPreviewContainer = document.getElementById('cameraPreviewContainer');
-        const cameraGifPreview = document.getElementById('cameraGifPreview');
-        const cameraDownloadLink = document.getElementById('cameraDownloadLink');
-        
-        let mediaStream = null;
-        let mediaRecorder = null;
-        let recordedChunks = [];
-        let isRecording = false;
-        let recordingStartTime = null;
-        let durationInterval = null;
-        let estimatedFrames = 0;
-        
-        // Populate camera list
-        async function getCameras() {
-            try {
-                // Request permission first to get device labels
-                await navigator.mediaDevices.getUserMedia({ video: true });
-                const devices = await navigator.mediaDevices.enumerateDevices();
-                const videoDevices = devices.filter(device => device.kind === 'videoinput');
-                
-                cameraSelect.innerHTML = '';
-                if (videoDevices.length === 0) {
-                    cameraSelect.innerHTML = '<option value="">No cameras found</option>';
-                    return;
-                }
-                
-                videoDevices.forEach((device, index) => {
-                    const option = document.createElement('option');
-                    option.value = device.deviceId;
-                    option.textContent = device.label || `Camera ${index + 1}`;
-                    cameraSelect.appendChild(option);
-                });
-                
-                // Stop the initial stream
-                const stream = await navigator.mediaDevices.getUserMedia({ video: true });
-                stream.getTracks().forEach(track => track.stop());
-                
-            } catch (err) {
-                console.error('Error getting cameras:', err);
-                cameraSelect.innerHTML = '<option value="">Camera access denied</option>';
-                showCameraStatus('error', getCameraErrorMessage(err));
-            }
-        }
-        
-        function getCameraErrorMessage(err) {
-            if (err.name === 'NotAllowedError' || err.name === 'PermissionDeniedError') {
-                return 'Camera access denied. Please allow camera permissions in your browser settings.';
-            } else if (err.name === 'NotFoundError' || err.name === 'DevicesNotFoundError') {
-                return 'No camera found. Please connect a camera and try again.';
-            } else if (err.name === 'NotReadableError' || err.name === 'TrackStartError') {
-                return 'Camera is already in use by another application.';
-            } else if (err.name === 'OverconstrainedError') {
-                return 'Camera does not support the requested settings.';
-            } else if (err.name === 'NotSupportedError') {
-                return 'Camera access is not supported in this browser. Please use HTTPS.';
-            }
-            return `Camera error: ${err.message}`;
-        }
-        
-        // Start camera
-        async function startCamera() {
-            try {
-                // Stop existing stream
-                if (mediaStream) {
-                    mediaStream.getTracks().forEach(track => track.stop());
-                }
-                
-                const deviceId = cameraSelect.value;
-                const constraints = {
-                    video: deviceId ? { deviceId: { exact: deviceId } } : true,
-                    audio: false
-                };
-                
-                mediaStream = await navigator.mediaDevices.getUserMedia(constraints);
-                cameraPreview.srcObject = mediaStream;
-                cameraPlaceholder.style.display = 'none';
-                cameraPreview.style.display = 'block';
-                
-                recordBtn.disabled = false;
-                startCameraBtn.textContent = 'Restart Camera';
-                showCameraStatus('success', 'Camera started successfully!');
-                
-                // Hide status after 2 seconds
-                setTimeout(() => {
-                    cameraStatus.className = 'status';
-                    cameraStatus.style.display = 'none';
-                }, 2000);
-                
-            } catch (err) {
-                console.error('Error starting camera:', err);
-                showCameraStatus('error', getCameraErrorMessage(err));
-            }
-        }
-        
-        // Show camera status
-        function showCameraStatus(type, message) {
-            cameraStatus.className = `status ${type}`;
-            cameraStatus.textContent = message;
-            cameraStatus.style.display = 'block';
-        }
-        
-        // Start/Stop recording
-        function toggleRecording() {
-            if (!isRecording) {
-                startRecording();
-            } else {
-                stopRecording();
-            }
-        }
-        
-        function startRecording() {
-            recordedChunks = [];
-            
-            // Determine the best mime type
-            const mimeTypes = [
-                'video/webm;codecs=vp9',
-                'video/webm;codecs=vp8',
-                'video/webm',
-                'video/mp4'
-            ];
-            
-            let selectedMimeType = '';
-            for (const mimeType of mimeTypes) {
-                if (MediaRecorder.isTypeSupported(mimeType)) {
-                    selectedMimeType = mimeType;
-                    break;
-                }
-            }
-            
-            if (!selectedMimeType) {
-                showCameraStatus('error', 'No supported video format found in this browser.');
-                return;
-            }
-            
-            try {
-                mediaRecorder = new MediaRecorder(mediaStream, { mimeType: selectedMimeType });
-                
-                mediaRecorder.ondataavailable = (event) => {
-                    if (event.data.size > 0) {
-                        recordedChunks.push(event.data);
-                    }
-                };
-                
-                mediaRecorder.onstop = () => {
-                    createGifBtn.disabled = recordedChunks.length === 0;
-                };
-                
-                mediaRecorder.start(100); // Collect data every 100ms
-                isRecording = true;
-                recordingStartTime = Date.now();
-                
-                // Update UI
-                recordBtn.textContent = '⏹️ Stop Recording';
-                recordBtn.classList.add('recording');
-                recordingIndicator.classList.add('active');
-                createGifBtn.disabled = true;
-                
-                // Start duration timer
-                const maxFrames = parseInt(maxFramesSlider.value);
-                const fps = parseInt(cameraFpsSlider.value);
-                const maxDuration = (maxFrames / fps) * 1000;
-                
-                durationInterval = setInterval(() => {
-                    const elapsed = Date.now() - recordingStartTime;
-                    const seconds = Math.floor(elapsed / 1000);
-                    const minutes = Math.floor(seconds / 60);
-                    const secs = seconds % 60;
-                    recordingDuration.textContent = `${minutes}:${secs.toString().padStart(2, '0')}`;
-                    
-                    // Estimate frames
-                    estimatedFrames = Math.floor((elapsed / 1000) * fps);
-                    frameCount.textContent = Math.min(estimatedFrames, maxFrames);
-                    
-                    // Auto-stop at max duration
-                    if (elapsed >= maxDuration) {
-                        stopRecording();
-                    }
-                }, 100);
-                
-                showCameraStatus('info', 'Recording... Press stop when done.');
-                
-            } catch (err) {
-                console.error('Error starting recording:', err);
-                showCameraStatus('error', `Recording error: ${err.message}`);
-            }
-        }
-        
-        function stopRecording() {
-            if (mediaRecorder && mediaRecorder.state !== 'inactive') {
-                mediaRecorder.stop();
-            }
-            
-            isRecording = false;
-            
-            // Clear timer
-            if (durationInterval) {
-                clearInterval(durationInterval);
-                durationInterval = null;
-            }
-            
-            // Update UI
-            recordBtn.textContent = '🔴 Start Recording';
-            recordBtn.classList.remove('recording');
-            recordingIndicator.classList.remove('active');
-            
-            if (recordedChunks.length > 0) {
-                showCameraStatus('success', `Recording stopped. ${estimatedFrames} frames captured. Click "Create GIF" to convert.`);
-                createGifBtn.disabled = false;
-            } else {
-                showCameraStatus('info', 'No frames recorded.');
-            }
-        }
-        
-        // Create GIF from recording
-        async function createGifFromRecording() {
-            if (recordedChunks.length === 0) {
-                showCameraStatus('error', 'No recording available.');
-                return;
-            }
-            
-            createGifBtn.disabled = true;
-            recordBtn.disabled = true;
-            cameraProgressBar.style.display = 'block';
-            cameraProgressFill.style.width = '30%';
-            showCameraStatus('info', 'Processing recording...');
-            cameraPreviewContainer.style.display = 'none';
-            
-            try {
-                // Create blob from recorded chunks
-                const mimeType = recordedChunks.length > 0 && recordedChunks[0].type ? recordedChunks[0].type : 'video/webm';
-                const blob = new Blob(recordedChunks, { type: mimeType });
-                
-                // Determine file extension
-                const ext = blob.type.includes('mp4') ? 'mp4' : 'webm';
-                
-                const formData = new FormData();
-                formData.append('file', blob, `recording.${ext}`);
-                formData.append('fps', cameraFpsSlider.value);
-                formData.append('width', cameraWidthSlider.value);
-                
-                cameraProgressFill.style.width = '60%';
-                
-                const response = await fetch('/convert', {
-                    method: 'POST',
-                    body: formData
-                });
-                
-                cameraProgressFill.style.width = '90%';
-                
-                if (!response.ok) {
-                    const error = await response.json();
-                    throw new Error(error.detail || 'Conversion failed');
-                }
-                
-                const result = await response.json();
-                cameraProgressFill.style.width = '100%';
-                
-                showCameraStatus('success', `GIF created successfully! Size: ${result.file_size}`);
-                
-                // Show preview and download link
-                cameraGifPreview.src = `/download/${result.filename}?t=${Date.now()}`;
-                cameraDownloadLink.href = `/download/${result.filename}`;
-                cameraDownloadLink.download = result.filename;
-                cameraPreviewContainer.style.display = 'block';
-                
-            } catch (err) {
-                console.error('Error creating GIF:', err);
-                showCameraStatus('error', `Error: ${err.message}`);
-            } finally {
-                createGifBtn.disabled = recordedChunks.length === 0;
-                recordBtn.disabled = !mediaStream;
-                setTimeout(() => {
-                    cameraProgressBar.style.display = 'none';
-                    cameraProgressFill.style.width = '0%';
-                }, 1000);
-            }
-        }
-        
-        // Event listeners for camera tab
-        startCameraBtn.addEventListener('click', startCamera);
-        recordBtn.addEventListener('click', toggleRecording);
-        createGifBtn.addEventListener('click', createGifFromRecording);
-        
-        cameraFpsSlider.addEventListener('input', () => {
-            cameraFpsValue.textContent = cameraFpsSlider.value;
-        });
-        
-        cameraWidthSlider.addEventListener('input', () => {
-            cameraWidthValue.textContent = cameraWidthSlider.value;
-        });
-        
-        maxFramesSlider.addEventListener('input', () => {
-            maxFramesValue.textContent = maxFramesSlider.value;
-            maxFramesDisplay.textContent = maxFramesSlider.value;
-        });
-        
-        cameraSelect.addEventListener('change', () => {
-            if (mediaStream) {
-                startCamera();
-            }
-        });
-        
-        // Initialize camera list on page load
-        getCameras();
-        
-        // ============ UPLOAD TAB ============
-        const uploadArea = document.getElementById('uploadArea');
-        const fileInput = document.getElementById('fileInput');
-        const fileInfo = document.getElementById('fileInfo');
-        const fileName = document.getElementById('fileName');
-        const fpsSlider = document.getElementById('fpsSlider');
-        const fpsValue = document.getElementById('fpsValue');
-        const widthSlider = document.getElementById('widthSlider');
-        const widthValue = document.getElementById('widthValue');
-        const convertBtn = document.getElementById('convertBtn');
-        const status = document.getElementById('status');
-        const progressBar = document.getElementById('progressBar');
-        const progressFill = document.getElementById('progressFill');
-        const previewContainer = document.getElementById('previewContainer');
-        const gifPreview = document.getElementById('gifPreview');
-        const downloadLink = document.getElementById('downloadLink');
-        
-        let selectedFile = null;
-        
-        // Upload area click handler
-        uploadArea.addEventListener('click', () => fileInput.click());
-        
-        // Drag and drop handlers
-        uploadArea.addEventListener('dragover', (e) => {
-            e.preventDefault();
-            uploadArea.classList.add('dragover');
-        });
-        
-        uploadArea.addEventListener('dragleave', () => {
-            uploadArea.classList.remove('dragover');
-        });
-        
-        uploadArea.addEventListener('drop', (e) => {
-            e.preventDefault();
-            uploadArea.classList.remove('dragover');
-            const files = e.dataTransfer.files;
-            if (files.length > 0 && files[0].type.startsWith('video/')) {
-                handleFileSelect(files[0]);
-            }
-        });
-        
-        // File input change handler
-        fileInput.addEventListener('change', (e) => {
-            if (e.target.files.length > 0) {
-                handleFileSelect(e.target.files[0]);
-            }
-        });
-        
-        function handleFileSelect(file) {
-            selectedFile = file;
-            fileName.textContent = file.name;
-            fileInfo.style.display = 'block';
-            convertBtn.disabled = false;
-            previewContainer.style.display = 'none';
-            status.className = 'status';
-            status.style.display = 'none';
-        }
-        
-        // Slider handlers
-        fpsSlider.addEventListener('input', () => {
-            fpsValue.textContent = fpsSlider.value;
-        });
-        
-        widthSlider.addEventListener('input', () => {
-            widthValue.textContent = widthSlider.value;
-        });
-        
-        // Convert button handler
-        convertBtn.addEventListener('click', async () => {
-            if (!selectedFile) return;
-            
-            convertBtn.disabled = true;
-            status.className = 'status info';
-            status.textContent = 'Uploading and converting...';
-            progressBar.style.display = 'block';
-            progressFill.style.width = '30%';
-            previewContainer.style.display = 'none';
-            
-            const formData = new FormData();
-            formData.append('file', selectedFile);
-            formData.append('fps', fpsSlider.value);
-            formData.append('width', widthSlider.value);
-            
-            try {
-                progressFill.style.width = '60%';
-                
-                const response = await fetch('/convert', {
-                    method: 'POST',
-                    body: formData
-                });
-                
-                progressFill.style.width = '90%';
-                
-                if (!response.ok) {
-                    const error = await response.json();
-                    throw new Error(error.detail || 'Conversion failed');
-                }
-                
-                const result = await response.json();
-                progressFill.style.width = '100%';
-                
-                status.className = 'status success';
-                status.textContent = `GIF created successfully! Size: ${result.file_size}`;
-                
-                // Show preview and download link
-                gifPreview.src = `/download/${result.filename}?t=${Date.now()}`;
-                downloadLink.href = `/download/${result.filename}`;
-                downloadLink.download = result.filename;
-                previewContainer.style.display = 'block';
-                
-            } catch (error) {
-                status.className = 'status error';
-                status.textContent = `Error: ${error.message}`;
-            } finally {
-                convertBtn.disabled = false;
-                setTimeout(() => {
-                    progressBar.style.display = 'none';
-                    progressFill.style.width = '0%';
-                }, 1000);
-            }
-        });
-        
-        // Cleanup on page unload
-        window.addEventListener('beforeunload', () => {
-            if (mediaStream) {
-                mediaStream.getTracks().forEach(track => track.stop());
-            }
-        });
-    </script>
-</body>
-</html>
-    """
-    return HTMLResponse(content=html_content)
+    accepted = {
+        token.split(';')[0].strip()
+        for token in request.headers.get('accept-encoding', '').split(',')
+    }
+    encoding = next(
+        (e for e in ('br', 'gzip') if e in accepted and e in _INDEX_VARIANTS),
+        'identity'
+    )
+    body, headers = _INDEX_VARIANTS[encoding]
+    if headers['ETag'] in request.headers.get('if-none-match', ''):
+        return Response(status_code=304, headers=headers)
+    # A fresh Response per request: middleware may add headers in place,
+    # so a shared instance would accumulate them
+    return HTMLResponse(content=body, headers=headers)
 
 
 @app.get("/health")
@@ -1157,8 +636,10 @@ async def health_check():
     return {"status": "healthy", "service": "gif-maker-live"}
 
 
-@app.post("/convert")
+@api.post("/convert", status_code=202)
 async def convert_video(
+    background: BackgroundTasks,
+    response: Response,
     file: UploadFile = File(...),
     fps: int = Form(default=10),
     width: int = Form(default=320)
@@ -1172,103 +653,188 @@ async def convert_video(
         width: Width of the output GIF in pixels (100-800)
     
     Returns:
-        JSON with the filename and file size of the created GIF
+        202 Accepted with the job id, and its /api/jobs/{job_id} status URL in
+        the Location header
     """
+    global _pending_jobs
     # Validate parameters
     fps = max(1, min(30, fps))
     width = max(100, min(800, width))
     
-    # Validate file extension
-    allowed_extensions = {'.mp4', '.avi', '.mov', '.webm', '.mkv', '.m4v'}
-    file_ext = Path(file.filename or '').suffix.lower()
-    if file_ext not in allowed_extensions:
+    # Validate file extension. Without a dot rpartition leaves the whole
+    # name in ext, which can never match, so such uploads are rejected too.
+    _, dot, ext = (file.filename or '').rpartition('.')
+    file_ext = dot + ext.lower()
+    if file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid file type. Allowed types: {', '.join(allowed_extensions)}"
+            detail=f"Invalid file type. Allowed types: {_ALLOWED_EXTENSIONS_LIST}"
         )
     
-    # Maximum file size: 100MB
-    max_file_size = 100 * 1024 * 1024
+    # Starlette records the size while spooling the upload, so oversized
+    # files can be rejected before anything is copied
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail=_FILE_TOO_LARGE)
     
-    # Generate unique filename
-    unique_id = str(uuid.uuid4())[:8]
-    video_ext = file_ext or '.mp4'
-    video_path = UPLOAD_DIR / f"{unique_id}{video_ext}"
-    gif_filename = f"output_{unique_id}.gif"
-    gif_path = OUTPUT_DIR / gif_filename
+    # The upload gets a throwaway name: the job id is only known once the
+    # whole video has been hashed
+    video_path = f"{_UPLOAD_PREFIX}{secrets.token_hex(8)}{file_ext}"
+    # The same video with the same settings maps to the same job, so a repeat
+    # upload reuses the GIF (or the conversion already running) instead of
+    # converting again. Being a hash of the content, an id can only be
+    # derived by someone who already has the video.
+    hasher = hashlib.blake2b(f"{_PIPELINE_KEY}:{fps}:{width}:{file_ext}:".encode(), digest_size=8)
     
     try:
-        # Read uploaded video with size limit
-        content = await file.read()
-        if len(content) > max_file_size:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Maximum size is {max_file_size // (1024*1024)}MB"
-            )
-        
-        with open(video_path, 'wb') as f:
-            f.write(content)
-        
-        # Convert to GIF
-        convert_video_to_gif(
-            str(video_path),
-            str(gif_path),
-            fps=fps,
-            width=width
+        # Stream uploaded video to disk in chunks, enforcing the size limit
+        async with aiofiles.open(video_path, 'wb') as f:
+            async for chunk in _upload_chunks(file):
+                hasher.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        _safe_unlink(video_path)
+        raise
+    
+    job_id = hasher.hexdigest()
+    gif_path = f"{_OUTPUT_PREFIX}output_{job_id}.gif"
+    response.headers["Location"] = f"/api/jobs/{job_id}"
+    
+    try:
+        # Already converted: restart its clock so the sweeper keeps it
+        os.utime(gif_path)
+        background.add_task(_safe_unlink, video_path)
+        return {"job_id": job_id}
+    except FileNotFoundError:
+        pass
+    
+    if _pending_jobs >= MAX_PENDING_JOBS:
+        _safe_unlink(video_path)
+        raise HTTPException(
+            status_code=429,
+            detail="Server is busy converting other videos. Please try again shortly.",
+            headers={"Retry-After": _RETRY_AFTER}
         )
-        
-        # Get file size
-        file_size = os.path.getsize(gif_path)
-        if file_size < 1024:
-            size_str = f"{file_size} bytes"
-        elif file_size < 1024 * 1024:
-            size_str = f"{file_size / 1024:.1f} KB"
-        else:
-            size_str = f"{file_size / (1024 * 1024):.1f} MB"
-        
+    
+    # An earlier failed attempt is retried rather than reported again
+    _safe_unlink(f"{gif_path}.err")
+    # Mark the job as pending, or join the conversion already running
+    if not _claim_job(f"{gif_path}.part"):
+        background.add_task(_safe_unlink, video_path)
+        return {"job_id": job_id}
+    
+    # Convert after the response has gone out. Counted now, not when the task
+    # starts, so uploads arriving before then see this job; _run_job
+    # releases it
+    _pending_jobs += 1
+    background.add_task(_run_job, video_path, gif_path, fps, width)
+    return {"job_id": job_id}
+
+
+@api.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Report the state of a conversion job.
+    
+    Args:
+        job_id: ID returned by /api/convert
+    
+    Returns:
+        JSON with the job state ("pending", "done" or "failed"); finished
+        jobs include the filename and file size of the created GIF
+    """
+    if not _JOB_ID.fullmatch(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job id")
+    
+    gif_filename = f"output_{job_id}.gif"
+    gif_path = f"{_OUTPUT_PREFIX}{gif_filename}"
+    
+    try:
+        file_size = os.stat(gif_path).st_size
         return {
+            "state": "done",
             "filename": gif_filename,
-            "file_size": size_str,
-            "fps": fps,
-            "width": width
+            "file_size": _format_size(file_size)
         }
-        
-    finally:
-        # Clean up uploaded video file
-        if video_path.exists():
-            try:
-                os.unlink(video_path)
-            except Exception:
-                pass
+    except FileNotFoundError:
+        pass
+    
+    try:
+        with open(f"{gif_path}.err", encoding='utf-8') as f:
+            return {"state": "failed", "detail": f.read()}
+    except FileNotFoundError:
+        pass
+    
+    if os.path.exists(f"{gif_path}.part"):
+        return {"state": "pending"}
+    
+    raise HTTPException(status_code=404, detail="Job not found")
 
 
-@app.get("/download/{filename}")
-async def download_gif(filename: str):
+@api.get("/download/{filename}")
+async def download_gif(filename: str, request: Request):
     """
     Download a generated GIF file.
     
     Args:
         filename: Name of the GIF file to download
+        request: Incoming request, checked for If-None-Match
     
     Returns:
-        The GIF file as a downloadable response
+        The GIF file as a downloadable response, or 304 when the client's
+        cached copy is current
     """
-    # Validate filename to prevent directory traversal
-    if ".." in filename or "/" in filename or "\\" in filename:
+    # Only finished GIF names are served; this also rules out traversal and
+    # the job's .part/.err state files
+    if not _GIF_NAME.fullmatch(filename):
         raise HTTPException(status_code=400, detail="Invalid filename")
     
-    file_path = OUTPUT_DIR / filename
+    file_path = f"{_OUTPUT_PREFIX}{filename}"
     
-    if not file_path.exists():
+    # One stat both checks existence and is handed to FileResponse, which
+    # would otherwise stat the file again for its headers
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    if not stat.S_ISREG(st.st_mode):
         raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(
-        path=str(file_path),
+    if ACCEL_REDIRECT_PREFIX:
+        return Response(
+            media_type="image/gif",
+            headers={
+                "X-Accel-Redirect": f"{ACCEL_REDIRECT_PREFIX}{filename}",
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "Cache-Control": _CACHE_FOREVER,
+            }
+        )
+    
+    response = GifFileResponse(
+        path=file_path,
         media_type="image/gif",
-        filename=filename
+        filename=filename,
+        stat_result=st,
+        headers={'Cache-Control': _CACHE_FOREVER}
     )
+    # The ETag comes from the same stat, so a revalidating preview or
+    # repeat download costs no file I/O
+    etag = response.headers['etag']
+    if etag in request.headers.get('if-none-match', ''):
+        return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': _CACHE_FOREVER})
+    return response
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    workers = int(os.environ.get("WEB_CONCURRENCY", max(2, os.cpu_count() or 2)))
+    # Exported so every worker sizes its FFmpeg slots for its share of the CPUs
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=workers,
+        loop="uvloop",
+        http="httptools",
+        limit_concurrency=64
+    )
@@ -1,7 +1,9 @@
 import ffmpeg
+import json
 import os
 import sys
 import tempfile
+import time
 import cv2
 import numpy as np
 from datetime import datetime
@@ -9,34 +11,112 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QLabel, QPushButton, QLineEdit, 
                              QSlider, QMessageBox, QProgressBar, QComboBox,
                              QGroupBox, QGridLayout)
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QTimer, QMutex, QStandardPaths
 from PyQt6.QtGui import QPixmap, QFont, QImage
 
+CAMERA_CACHE = os.path.join(os.path.expanduser('~'), '.cache', 'livegifmaker', 'cameras.json')
+# DirectShow opens much faster than the default Media Foundation backend
+CAPTURE_API = cv2.CAP_DSHOW if sys.platform == 'win32' else cv2.CAP_ANY
+# Resize recorded frames through OpenCL (OpenCV's UMat). Opt-in, since for
+# webcam-sized frames the upload and readback often cost more than the resize
+USE_OPENCL = os.environ.get('GIF_OPENCL') == '1' and cv2.ocl.haveOpenCL()
+
+def load_camera_cache():
+    try:
+        with open(CAMERA_CACHE) as f:
+            return [int(i) for i in json.load(f)]
+    except (OSError, ValueError, TypeError):
+        return None
+
+class CameraProbeWorker(QThread):
+    cameras_found = pyqtSignal(list)
+    
+    def __init__(self, in_use=None):
+        super().__init__()
+        self.in_use = in_use
+        
+    def run(self):
+        cameras = []
+        for i in range(5):  # Check first 5 camera indices
+            # The open camera may refuse a second handle, so don't try it
+            if i == self.in_use:
+                cameras.append(i)
+                continue
+            cap = cv2.VideoCapture(i, CAPTURE_API)
+            if cap.isOpened():
+                cameras.append(i)
+            cap.release()
+        
+        try:
+            os.makedirs(os.path.dirname(CAMERA_CACHE), exist_ok=True)
+            with open(CAMERA_CACHE, 'w') as f:
+                json.dump(cameras, f)
+        except OSError:
+            pass
+        self.cameras_found.emit(cameras)
+
 class CameraWorker(QThread):
-    frame_ready = pyqtSignal(np.ndarray)
     error = pyqtSignal(str)
     
-    def __init__(self, camera_index=0):
+    def __init__(self, camera_index=0, target_fps=30, capture_width=640):
         super().__init__()
         self.camera_index = camera_index
+        self.target_fps = target_fps
+        self.capture_width = capture_width
         self.running = False
         self.cap = None
+        # The GUI polls for the newest frame instead of being sent every one;
+        # recorded frames are copied straight into the record buffer here
+        self.frame_lock = QMutex()
+        self.latest_frame = None
+        self.record_buffer = None
+        self.record_file = None
+        self.record_limit = 0
+        self.recorded_count = 0
+        self.is_recording = False
         
     def run(self):
         try:
-            self.cap = cv2.VideoCapture(self.camera_index)
+            self.cap = cv2.VideoCapture(self.camera_index, CAPTURE_API)
             if not self.cap.isOpened():
                 self.error.emit(f"Could not open camera {self.camera_index}")
                 return
+            
+            # Keep at most one frame queued so the preview isn't running
+            # behind, and ask for MJPG, which USB webcams deliver without
+            # the bandwidth limits of raw YUYV; drivers ignore what they
+            # don't support
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+            self.cap.set(cv2.CAP_PROP_FPS, self.target_fps)
+            # Capture close to the size that's actually used rather than at
+            # the sensor's native resolution; the driver picks the nearest mode
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.capture_width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.capture_width * 3 // 4)
                 
             self.running = True
+            # Every frame is grabbed to keep the driver queue drained, but only
+            # those due at target_fps are decoded and emitted
+            interval = 1.0 / self.target_fps
+            next_emit = time.perf_counter()
             while self.running:
-                ret, frame = self.cap.read()
-                if ret:
-                    self.frame_ready.emit(frame)
-                else:
+                if not self.cap.grab():
                     self.error.emit("Failed to read frame from camera")
                     break
+                now = time.perf_counter()
+                if now < next_emit:
+                    continue
+                # Don't let a stall turn into a burst of catch-up frames
+                next_emit = max(next_emit + interval, now)
+                ret, frame = self.cap.retrieve()
+                if ret:
+                    self.frame_lock.lock()
+                    try:
+                        self.latest_frame = frame
+                        if self.is_recording:
+                            self.record_frame(frame)
+                    finally:
+                        self.frame_lock.unlock()
                     
         except Exception as e:
             self.error.emit(f"Camera error: {str(e)}")
@@ -44,13 +124,56 @@ class CameraWorker(QThread):
             if self.cap:
                 self.cap.release()
     
+    def record_frame(self, frame):
+        if self.recorded_count >= self.record_limit:
+            return
+        # Allocated on the first frame and reused while it's big enough and
+        # the same shape. It's backed by a temporary file so a long recording
+        # sits in reclaimable page cache instead of the process's own memory
+        if self.recorded_count == 0 and (
+            self.record_buffer is None
+            or len(self.record_buffer) < self.record_limit
+            or self.record_buffer.shape[1:] != frame.shape
+        ):
+            # The old mapping goes before the file under it is closed
+            self.record_buffer = None
+            if self.record_file:
+                self.record_file.close()
+            self.record_file = tempfile.TemporaryFile(prefix='livegif_')
+            self.record_buffer = np.memmap(self.record_file, dtype=np.uint8, mode='w+',
+                                           shape=(self.record_limit, *frame.shape))
+        elif self.record_buffer.shape[1:] != frame.shape:
+            return
+        np.copyto(self.record_buffer[self.recorded_count], frame)
+        self.recorded_count += 1
+    
+    def take_frame(self):
+        self.frame_lock.lock()
+        frame, self.latest_frame = self.latest_frame, None
+        self.frame_lock.unlock()
+        return frame
+    
+    def start_recording(self, max_frames):
+        self.frame_lock.lock()
+        self.record_limit = max_frames
+        self.recorded_count = 0
+        self.is_recording = True
+        self.frame_lock.unlock()
+    
+    def stop_recording(self):
+        self.frame_lock.lock()
+        self.is_recording = False
+        frames = self.record_buffer[:self.recorded_count] if self.recorded_count else None
+        self.frame_lock.unlock()
+        return frames
+    
     def stop(self):
         self.running = False
         if self.cap:
             self.cap.release()
 
 class RecordingWorker(QThread):
-    finished = pyqtSignal(str)
+    finished = pyqtSignal(str, int)
     error = pyqtSignal(str)
     progress = pyqtSignal(str)
     
@@ -64,53 +187,65 @@ class RecordingWorker(QThread):
     def run(self):
         try:
             self.progress.emit("Converting frames to GIF...")
-            
-            # Create temporary video file
-            temp_video = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
-            temp_video_path = temp_video.name
-            temp_video.close()
+            os.makedirs(os.path.dirname(self.output_file), exist_ok=True)
             
             # Calculate height maintaining aspect ratio
-            if self.frames:
+            if len(self.frames):
                 original_height, original_width = self.frames[0].shape[:2]
                 height = int((self.width * original_height) / original_width)
             else:
                 height = int(self.width * 0.75)  # Default aspect ratio
             
-            # Create video writer
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(temp_video_path, fourcc, self.fps, (self.width, height))
-            
-            # Write frames to video
-            for i, frame in enumerate(self.frames):
-                # Resize frame
-                resized_frame = cv2.resize(frame, (self.width, height))
-                out.write(resized_frame)
-                
-                if i % 5 == 0:  # Update progress every 5 frames
-                    progress = (i / len(self.frames)) * 50  # First 50% for video creation
-                    self.progress.emit(f"Processing frame {i + 1}/{len(self.frames)} ({progress:.0f}%)")
-            
-            out.release()
-            
-            # Convert video to GIF using FFmpeg
-            self.progress.emit("Converting video to GIF...")
-            (
+            # Feed the resized frames to FFmpeg as raw BGR so the GIF is
+            # encoded straight from them, with no intermediate video file
+            frames_in = ffmpeg.input('pipe:', format='rawvideo', pix_fmt='bgr24',
+                                     s=f'{self.width}x{height}', framerate=self.fps)
+            # One pass builds a palette tuned to the clip, the other maps
+            # every frame onto it
+            split = frames_in.split()
+            palette = split[0].filter('palettegen', max_colors=128, stats_mode='diff', reserve_transparent=0)
+            process = (
                 ffmpeg
-                .input(temp_video_path)
-                .filter('fps', fps=self.fps, round='up')
-                .filter('scale', self.width, -1, flags='lanczos')
+                .filter([split[1], palette], 'paletteuse', dither='bayer', bayer_scale=5)
                 .output(self.output_file, loop=0)
-                .run(overwrite_output=True, quiet=True)
+                .global_args('-loglevel', 'error')
+                .overwrite_output()
+                .run_async(pipe_stdin=True, pipe_stderr=True)
             )
             
-            # Clean up temporary video
+            # Every frame is resized into this one buffer, which is written
+            # out before the next resize, instead of a new array per frame
+            resized_frame = np.empty((height, self.width, 3), dtype=np.uint8)
+            # Likewise one device-side buffer for the OpenCL path. Its
+            # readback can't go into resized_frame: OpenCV's Python UMat.get()
+            # only returns a new array
+            resized_umat = cv2.UMat(height, self.width, cv2.CV_8UC3) if USE_OPENCL else None
+            # Frames captured at the GIF size go out as they are
+            same_size = len(self.frames) and self.frames[0].shape[:2] == (height, self.width)
             try:
-                os.unlink(temp_video_path)
-            except:
-                pass
+                for i, frame in enumerate(self.frames):
+                    if same_size:
+                        process.stdin.write(np.ascontiguousarray(frame).data)
+                    elif USE_OPENCL:
+                        cv2.resize(cv2.UMat(frame), (self.width, height), dst=resized_umat)
+                        process.stdin.write(resized_umat.get().data)
+                    else:
+                        cv2.resize(frame, (self.width, height), dst=resized_frame)
+                        process.stdin.write(resized_frame.data)
+                    
+                    if i % 5 == 0:  # Update progress every 5 frames
+                        progress = (i / len(self.frames)) * 100
+                        self.progress.emit(f"Processing frame {i + 1}/{len(self.frames)} ({progress:.0f}%)")
+            except BrokenPipeError:
+                pass  # FFmpeg exited early; its error is reported below
+            
+            _, stderr = process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(f"FFmpeg error: {stderr.decode('utf-8', errors='ignore')}")
                 
-            self.finished.emit(self.output_file)
+            # Stat here rather than on the GUI thread, which can stall on
+            # synced or network folders
+            self.finished.emit(self.output_file, os.path.getsize(self.output_file))
             
         except Exception as e:
             self.error.emit(str(e))
@@ -119,17 +254,31 @@ class LiveGifMakerWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.camera_worker = None
+        self.camera_probe = None
         self.recording_worker = None
-        self.recorded_frames = []
+        self.recorded_frames = None
+        self.recorded_count = 0
         self.is_recording = False
         self.fps = 8
         self.width = 320
         self.output_filename = "live_recording"
         self.max_frames = 150  # Limit recording length (about 10 seconds at 15 fps)
         
+        # Re-opens the camera for a new width once the slider settles
+        self.capture_width_timer = QTimer(self)
+        self.capture_width_timer.setSingleShot(True)
+        self.capture_width_timer.setInterval(500)
+        self.capture_width_timer.timeout.connect(self.apply_capture_width)
+        
         self.init_ui()
         self.init_camera()
         
+        # Redraw the preview at display rate from the camera's newest frame
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setInterval(33)
+        self.preview_timer.timeout.connect(self.refresh_preview)
+        self.preview_timer.start()
+        
     def init_ui(self):
         self.setWindowTitle("Live GIF Recorder")
         self.setGeometry(100, 100, 900, 800)
@@ -158,7 +307,9 @@ class LiveGifMakerWindow(QMainWindow):
         
         camera_layout.addWidget(QLabel("Camera:"), 0, 0)
         self.camera_combo = QComboBox()
-        self.populate_cameras()
+        # Start from the last probe's cameras; a fresh probe runs in the
+        # background since opening each device can take seconds
+        self.populate_cameras(load_camera_cache())
         self.camera_combo.currentIndexChanged.connect(self.change_camera)
         camera_layout.addWidget(self.camera_combo, 0, 1)
         
@@ -272,62 +423,92 @@ class LiveGifMakerWindow(QMainWindow):
         self.status_label.setStyleSheet("QLabel { padding: 10px; background-color: #e8f4f8; border-radius: 5px; }")
         layout.addWidget(self.status_label)
 
-    def populate_cameras(self):
-        # Try to find available cameras
+    def populate_cameras(self, cameras, selected=None):
+        # Filling the list shouldn't switch cameras
+        self.camera_combo.blockSignals(True)
         self.camera_combo.clear()
-        for i in range(5):  # Check first 5 camera indices
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                self.camera_combo.addItem(f"Camera {i}", i)
-                cap.release()
-        
-        if self.camera_combo.count() == 0:
+        if cameras is None:
+            self.camera_combo.addItem("Searching for cameras...", -1)
+        elif not cameras:
             self.camera_combo.addItem("No cameras found", -1)
+        for i in cameras or []:
+            self.camera_combo.addItem(f"Camera {i}", i)
+        
+        index = self.camera_combo.findData(selected)
+        if index >= 0:
+            self.camera_combo.setCurrentIndex(index)
+        self.camera_combo.blockSignals(False)
 
     def init_camera(self):
         if self.camera_combo.count() > 0:
             camera_index = self.camera_combo.currentData()
             if camera_index >= 0:
                 self.start_camera(camera_index)
+        
+        self.camera_probe = CameraProbeWorker(self.camera_worker.camera_index if self.camera_worker else None)
+        self.camera_probe.cameras_found.connect(self.on_cameras_found)
+        self.camera_probe.start()
+    
+    def on_cameras_found(self, cameras):
+        running = self.camera_worker.camera_index if self.camera_worker else None
+        self.populate_cameras(cameras, selected=running)
+        camera_index = self.camera_combo.currentData()
+        if camera_index >= 0 and camera_index != running:
+            self.start_camera(camera_index)
     
     def start_camera(self, camera_index):
+        # Keep what was recorded so far rather than losing it with the worker
+        if self.is_recording:
+            self.toggle_recording()
         if self.camera_worker:
             self.camera_worker.stop()
             self.camera_worker.wait()
         
-        self.camera_worker = CameraWorker(camera_index)
-        self.camera_worker.frame_ready.connect(self.update_camera_display)
+        self.camera_worker = CameraWorker(camera_index, capture_width=self.capture_width())
         self.camera_worker.error.connect(self.on_camera_error)
         self.camera_worker.start()
     
+    def capture_width(self):
+        # Twice the GIF width leaves headroom for the preview
+        return max(self.width * 2, 640)
+    
+    def apply_capture_width(self):
+        # Every frame of a recording has to be the same size, so a change
+        # made while recording waits until it stops
+        if self.is_recording or not self.camera_worker:
+            return
+        if self.camera_worker.capture_width != self.capture_width():
+            self.start_camera(self.camera_worker.camera_index)
+    
     def change_camera(self, index):
         camera_index = self.camera_combo.currentData()
         if camera_index >= 0:
             self.start_camera(camera_index)
     
+    def refresh_preview(self):
+        frame = self.camera_worker.take_frame() if self.camera_worker else None
+        if frame is not None:
+            self.update_camera_display(frame)
+    
     def update_camera_display(self, frame):
-        # Convert frame to QImage and display
-        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_image.shape
-        bytes_per_line = ch * w
-        qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-        
-        # Scale image to fit display
-        pixmap = QPixmap.fromImage(qt_image)
-        scaled_pixmap = pixmap.scaled(
-            self.camera_label.size(),
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
+        # Scale to fit the display in OpenCV, so only the small preview is
+        # converted to a pixmap, then wrap the BGR result without converting
+        # colours; QPixmap.fromImage copies the pixels out before it returns
+        h, w = frame.shape[:2]
+        scale = min(self.camera_label.width() / w, self.camera_label.height() / h)
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        preview = cv2.resize(frame, size)
+        qt_image = QImage(preview.data, size[0], size[1], preview.strides[0], QImage.Format.Format_BGR888)
+        scaled_pixmap = QPixmap.fromImage(qt_image)
         self.camera_label.setPixmap(scaled_pixmap)
         
-        # Store frame if recording
+        # Frames are recorded by the camera worker; just report progress
         if self.is_recording:
-            self.recorded_frames.append(frame.copy())
-            self.frames_label.setText(f"Frames: {len(self.recorded_frames)}")
+            recorded_count = self.camera_worker.recorded_count
+            self.frames_label.setText(f"Frames: {recorded_count}")
             
             # Stop recording if max frames reached
-            if len(self.recorded_frames) >= self.max_frames:
+            if recorded_count >= min(self.max_frames, self.camera_worker.record_limit):
                 self.toggle_recording()
                 QMessageBox.information(self, "Recording Complete", f"Maximum frame limit reached ({self.max_frames} frames)")
     
@@ -338,7 +519,11 @@ class LiveGifMakerWindow(QMainWindow):
     def toggle_recording(self):
         if not self.is_recording:
             # Start recording
-            self.recorded_frames.clear()
+            if not self.camera_worker:
+                return
+            self.recorded_frames = None
+            self.recorded_count = 0
+            self.camera_worker.start_recording(self.max_frames)
             self.is_recording = True
             self.record_btn.setText("Stop Recording")
             self.record_btn.setStyleSheet("QPushButton { background-color: #ff9800; color: white; font-weight: bold; padding: 10px; }")
@@ -347,11 +532,15 @@ class LiveGifMakerWindow(QMainWindow):
         else:
             # Stop recording
             self.is_recording = False
+            self.recorded_frames = self.camera_worker.stop_recording()
+            self.recorded_count = 0 if self.recorded_frames is None else len(self.recorded_frames)
             self.record_btn.setText("Start Recording")
             self.record_btn.setStyleSheet("QPushButton { background-color: #f44336; color: white; font-weight: bold; padding: 10px; }")
             
-            if len(self.recorded_frames) > 0:
-                self.status_label.setText(f"Recording stopped. {len(self.recorded_frames)} frames captured")
+            self.capture_width_timer.start()
+            
+            if self.recorded_count > 0:
+                self.status_label.setText(f"Recording stopped. {self.recorded_count} frames captured")
                 self.create_gif_btn.setEnabled(True)
             else:
                 self.status_label.setText("No frames recorded")
@@ -366,13 +555,14 @@ class LiveGifMakerWindow(QMainWindow):
     def update_width(self, value):
         self.width = value
         self.width_label.setText(str(value))
+        self.capture_width_timer.start()
     
     def update_max_frames(self, value):
         self.max_frames = value
         self.max_frames_label.setText(str(value))
 
     def create_gif(self):
-        if not self.recorded_frames:
+        if self.recorded_count == 0:
             QMessageBox.warning(self, "Warning", "No frames recorded!")
             return
         
@@ -384,8 +574,8 @@ class LiveGifMakerWindow(QMainWindow):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{self.output_filename}_{timestamp}.gif"
         
-        # Set output path to Downloads folder - using your correct user directory
-        downloads_folder = r'C:\Users\mwilliams\Downloads'
+        # Set output path to the user's Downloads folder
+        downloads_folder = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.DownloadLocation)
         output_file = os.path.join(downloads_folder, filename)
         
         # Disable buttons during processing
@@ -396,9 +586,10 @@ class LiveGifMakerWindow(QMainWindow):
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 100)
         
-        # Start GIF creation
+        # Start GIF creation. The worker reads the recording in place; the
+        # buffer isn't written again until recording is re-enabled
         self.recording_worker = RecordingWorker(
-            self.recorded_frames.copy(),
+            self.recorded_frames,
             self.fps,
             self.width,
             output_file
@@ -408,17 +599,16 @@ class LiveGifMakerWindow(QMainWindow):
         self.recording_worker.progress.connect(self.on_progress_update)
         self.recording_worker.start()
 
-    def on_gif_creation_finished(self, output_file):
+    def on_gif_creation_finished(self, output_file, file_size):
         self.progress_bar.setVisible(False)
         self.enable_buttons()
         
-        file_size = os.path.getsize(output_file)
         file_size_mb = file_size / (1024 * 1024)
         
         QMessageBox.information(
             self,
             "Success",
-            f"GIF created successfully!\n\nFile: {os.path.basename(output_file)}\nFrames: {len(self.recorded_frames)}\nSize: {file_size_mb:.1f} MB\nLocation: {os.path.dirname(output_file)}"
+            f"GIF created successfully!\n\nFile: {os.path.basename(output_file)}\nFrames: {self.recorded_count}\nSize: {file_size_mb:.1f} MB\nLocation: {os.path.dirname(output_file)}"
         )
         self.status_label.setText(f"GIF created successfully! Size: {file_size_mb:.1f} MB")
 
@@ -433,11 +623,15 @@ class LiveGifMakerWindow(QMainWindow):
         self.status_label.setText(message)
 
     def enable_buttons(self):
-        self.create_gif_btn.setEnabled(len(self.recorded_frames) > 0)
+        self.create_gif_btn.setEnabled(self.recorded_count > 0)
         self.record_btn.setEnabled(True)
 
     def closeEvent(self, event):
         # Stop camera worker
+        self.preview_timer.stop()
+        self.capture_width_timer.stop()
+        if self.camera_probe:
+            self.camera_probe.wait()
         if self.camera_worker:
             self.camera_worker.stop()
             self.camera_worker.wait()
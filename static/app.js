@@ -0,0 +1,499 @@
+// Tab Navigation
+const tabBtns = document.querySelectorAll('.tab-btn');
+const tabContents = document.querySelectorAll('.tab-content');
+
+tabBtns.forEach(btn => {
+    btn.addEventListener('click', () => {
+        const tabId = btn.dataset.tab;
+
+        tabBtns.forEach(b => b.classList.remove('active'));
+        tabContents.forEach(c => c.classList.remove('active'));
+
+        btn.classList.add('active');
+        document.getElementById(tabId + 'Tab').classList.add('active');
+    });
+});
+
+// Poll a conversion job until it finishes; resolves with the job result
+async function waitForJob(jobId) {
+    while (true) {
+        const response = await fetch(`/api/jobs/${jobId}`);
+        const job = await response.json();
+        if (!response.ok || job.state === 'failed') {
+            throw new Error(job.detail || 'Conversion failed');
+        }
+        if (job.state === 'done') {
+            return job;
+        }
+        await new Promise(resolve => setTimeout(resolve, 500));
+    }
+}
+
+// ============ CAMERA TAB ============
+const cameraPreview = document.getElementById('cameraPreview');
+const cameraPlaceholder = document.getElementById('cameraPlaceholder');
+const cameraSelect = document.getElementById('cameraSelect');
+const startCameraBtn = document.getElementById('startCameraBtn');
+const recordBtn = document.getElementById('recordBtn');
+const recordingIndicator = document.getElementById('recordingIndicator');
+const recordingDuration = document.getElementById('recordingDuration');
+const frameCount = document.getElementById('frameCount');
+const maxFramesDisplay = document.getElementById('maxFramesDisplay');
+const cameraFpsSlider = document.getElementById('cameraFpsSlider');
+const cameraFpsValue = document.getElementById('cameraFpsValue');
+const cameraWidthSlider = document.getElementById('cameraWidthSlider');
+const cameraWidthValue = document.getElementById('cameraWidthValue');
+const maxFramesSlider = document.getElementById('maxFramesSlider');
+const maxFramesValue = document.getElementById('maxFramesValue');
+const createGifBtn = document.getElementById('createGifBtn');
+const cameraStatus = document.getElementById('cameraStatus');
+const cameraProgressBar = document.getElementById('cameraProgressBar');
+const cameraProgressFill = document.getElementById('cameraProgressFill');
+const cameraPreviewContainer = document.getElementById('cameraPreviewContainer');
+const cameraGifPreview = document.getElementById('cameraGifPreview');
+const cameraDownloadLink = document.getElementById('cameraDownloadLink');
+
+let mediaStream = null;
+let mediaRecorder = null;
+let recordedChunks = [];
+let recordedBlob = null;
+let isRecording = false;
+let recordingStartTime = null;
+let durationFrame = null;
+let autoStopTimer = null;
+let estimatedFrames = 0;
+
+// Populate camera list
+async function getCameras() {
+    try {
+        // Request permission first to get device labels, then release the
+        // camera straight away
+        const stream = await navigator.mediaDevices.getUserMedia({ video: true });
+        const devices = await navigator.mediaDevices.enumerateDevices();
+        stream.getTracks().forEach(track => track.stop());
+        const videoDevices = devices.filter(device => device.kind === 'videoinput');
+
+        cameraSelect.innerHTML = '';
+        if (videoDevices.length === 0) {
+            cameraSelect.innerHTML = '<option value="">No cameras found</option>';
+            return;
+        }
+
+        videoDevices.forEach((device, index) => {
+            const option = document.createElement('option');
+            option.value = device.deviceId;
+            option.textContent = device.label || `Camera ${index + 1}`;
+            cameraSelect.appendChild(option);
+        });
+    } catch (err) {
+        console.error('Error getting cameras:', err);
+        cameraSelect.innerHTML = '<option value="">Camera access denied</option>';
+        showCameraStatus('error', getCameraErrorMessage(err));
+    }
+}
+
+function getCameraErrorMessage(err) {
+    if (err.name === 'NotAllowedError' || err.name === 'PermissionDeniedError') {
+        return 'Camera access denied. Please allow camera permissions in your browser settings.';
+    } else if (err.name === 'NotFoundError' || err.name === 'DevicesNotFoundError') {
+        return 'No camera found. Please connect a camera and try again.';
+    } else if (err.name === 'NotReadableError' || err.name === 'TrackStartError') {
+        return 'Camera is already in use by another application.';
+    } else if (err.name === 'OverconstrainedError') {
+        return 'Camera does not support the requested settings.';
+    } else if (err.name === 'NotSupportedError') {
+        return 'Camera access is not supported in this browser. Please use HTTPS.';
+    }
+    return `Camera error: ${err.message}`;
+}
+
+// Start camera
+async function startCamera() {
+    try {
+        // Stop existing stream
+        if (mediaStream) {
+            mediaStream.getTracks().forEach(track => track.stop());
+        }
+
+        const deviceId = cameraSelect.value;
+        const constraints = {
+            video: deviceId ? { deviceId: { exact: deviceId } } : true,
+            audio: false
+        };
+
+        mediaStream = await navigator.mediaDevices.getUserMedia(constraints);
+        cameraPreview.srcObject = mediaStream;
+        cameraPlaceholder.style.display = 'none';
+        cameraPreview.style.display = 'block';
+
+        recordBtn.disabled = false;
+        startCameraBtn.textContent = 'Restart Camera';
+        showCameraStatus('success', 'Camera started successfully!');
+
+        // Hide status after 2 seconds
+        setTimeout(() => {
+            cameraStatus.className = 'status';
+            cameraStatus.style.display = 'none';
+        }, 2000);
+
+    } catch (err) {
+        console.error('Error starting camera:', err);
+        showCameraStatus('error', getCameraErrorMessage(err));
+    }
+}
+
+// Show camera status
+function showCameraStatus(type, message) {
+    cameraStatus.className = `status ${type}`;
+    cameraStatus.textContent = message;
+    cameraStatus.style.display = 'block';
+}
+
+// Start/Stop recording
+function toggleRecording() {
+    if (!isRecording) {
+        startRecording();
+    } else {
+        stopRecording();
+    }
+}
+
+function startRecording() {
+    recordedChunks = [];
+    recordedBlob = null;
+
+    // Determine the best mime type
+    const mimeTypes = [
+        'video/webm;codecs=vp9',
+        'video/webm;codecs=vp8',
+        'video/webm',
+        'video/mp4'
+    ];
+
+    let selectedMimeType = '';
+    for (const mimeType of mimeTypes) {
+        if (MediaRecorder.isTypeSupported(mimeType)) {
+            selectedMimeType = mimeType;
+            break;
+        }
+    }
+
+    if (!selectedMimeType) {
+        showCameraStatus('error', 'No supported video format found in this browser.');
+        return;
+    }
+
+    try {
+        mediaRecorder = new MediaRecorder(mediaStream, { mimeType: selectedMimeType });
+
+        mediaRecorder.ondataavailable = (event) => {
+            if (event.data.size > 0) {
+                recordedChunks.push(event.data);
+            }
+        };
+
+        // The final dataavailable fires before stop, so every chunk is in
+        // by now; join them once and drop the array's references
+        mediaRecorder.onstop = () => {
+            if (recordedChunks.length > 0) {
+                recordedBlob = new Blob(recordedChunks, { type: selectedMimeType });
+                showCameraStatus('success', `Recording stopped. ${estimatedFrames} frames captured. Click "Create GIF" to convert.`);
+            } else {
+                showCameraStatus('info', 'No frames recorded.');
+            }
+            recordedChunks.length = 0;
+            createGifBtn.disabled = !recordedBlob;
+        };
+
+        mediaRecorder.start(1000); // Collect data every second
+        isRecording = true;
+        recordingStartTime = performance.now();
+
+        // Update UI
+        recordBtn.textContent = '⏹️ Stop Recording';
+        recordBtn.classList.add('recording');
+        recordingIndicator.classList.add('active');
+        createGifBtn.disabled = true;
+
+        // Start duration timer
+        const maxFrames = parseInt(maxFramesSlider.value);
+        const fps = parseInt(cameraFpsSlider.value);
+        const maxDuration = (maxFrames / fps) * 1000;
+
+        // Display updates follow the compositor and only touch the DOM when
+        // a value changes; rAF pauses in background tabs, so the auto-stop
+        // is a separate timeout
+        let shownSeconds = -1;
+        let shownFrames = -1;
+        const tick = () => {
+            const elapsed = performance.now() - recordingStartTime;
+            const seconds = Math.floor(elapsed / 1000);
+            if (seconds !== shownSeconds) {
+                const minutes = Math.floor(seconds / 60);
+                const secs = seconds % 60;
+                recordingDuration.textContent = `${minutes}:${secs.toString().padStart(2, '0')}`;
+                shownSeconds = seconds;
+            }
+
+            // Estimate frames
+            estimatedFrames = Math.min(Math.floor((elapsed / 1000) * fps), maxFrames);
+            if (estimatedFrames !== shownFrames) {
+                frameCount.textContent = estimatedFrames;
+                shownFrames = estimatedFrames;
+            }
+            durationFrame = requestAnimationFrame(tick);
+        };
+        durationFrame = requestAnimationFrame(tick);
+
+        // Auto-stop at max duration
+        autoStopTimer = setTimeout(stopRecording, maxDuration);
+
+        showCameraStatus('info', 'Recording... Press stop when done.');
+
+    } catch (err) {
+        console.error('Error starting recording:', err);
+        showCameraStatus('error', `Recording error: ${err.message}`);
+    }
+}
+
+function stopRecording() {
+    if (mediaRecorder && mediaRecorder.state !== 'inactive') {
+        mediaRecorder.stop();
+    }
+
+    isRecording = false;
+
+    // Clear timers
+    cancelAnimationFrame(durationFrame);
+    clearTimeout(autoStopTimer);
+    durationFrame = null;
+    autoStopTimer = null;
+
+    // Update UI
+    recordBtn.textContent = '🔴 Start Recording';
+    recordBtn.classList.remove('recording');
+    recordingIndicator.classList.remove('active');
+}
+
+// Create GIF from recording
+async function createGifFromRecording() {
+    if (!recordedBlob) {
+        showCameraStatus('error', 'No recording available.');
+        return;
+    }
+
+    createGifBtn.disabled = true;
+    recordBtn.disabled = true;
+    cameraProgressBar.style.display = 'block';
+    cameraProgressFill.style.width = '30%';
+    showCameraStatus('info', 'Processing recording...');
+    cameraPreviewContainer.style.display = 'none';
+
+    try {
+        const blob = recordedBlob;
+
+        // Determine file extension
+        const ext = blob.type.includes('mp4') ? 'mp4' : 'webm';
+
+        const formData = new FormData();
+        formData.append('file', blob, `recording.${ext}`);
+        formData.append('fps', cameraFpsSlider.value);
+        formData.append('width', cameraWidthSlider.value);
+
+        cameraProgressFill.style.width = '60%';
+
+        const response = await fetch('/api/convert', {
+            method: 'POST',
+            body: formData
+        });
+
+        cameraProgressFill.style.width = '90%';
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Conversion failed');
+        }
+
+        const { job_id } = await response.json();
+        showCameraStatus('info', 'Converting to GIF...');
+        const result = await waitForJob(job_id);
+        cameraProgressFill.style.width = '100%';
+
+        showCameraStatus('success', `GIF created successfully! Size: ${result.file_size}`);
+
+        // Show preview and download link
+        cameraGifPreview.src = `/api/download/${result.filename}`;
+        cameraDownloadLink.href = `/api/download/${result.filename}`;
+        cameraDownloadLink.download = result.filename;
+        cameraPreviewContainer.style.display = 'block';
+
+    } catch (err) {
+        console.error('Error creating GIF:', err);
+        showCameraStatus('error', `Error: ${err.message}`);
+    } finally {
+        createGifBtn.disabled = !recordedBlob;
+        recordBtn.disabled = !mediaStream;
+        setTimeout(() => {
+            cameraProgressBar.style.display = 'none';
+            cameraProgressFill.style.width = '0%';
+        }, 1000);
+    }
+}
+
+// Event listeners for camera tab
+startCameraBtn.addEventListener('click', startCamera);
+recordBtn.addEventListener('click', toggleRecording);
+createGifBtn.addEventListener('click', createGifFromRecording);
+
+cameraFpsSlider.addEventListener('input', () => {
+    cameraFpsValue.textContent = cameraFpsSlider.value;
+});
+
+cameraWidthSlider.addEventListener('input', () => {
+    cameraWidthValue.textContent = cameraWidthSlider.value;
+});
+
+maxFramesSlider.addEventListener('input', () => {
+    maxFramesValue.textContent = maxFramesSlider.value;
+    maxFramesDisplay.textContent = maxFramesSlider.value;
+});
+
+cameraSelect.addEventListener('change', () => {
+    if (mediaStream) {
+        startCamera();
+    }
+});
+
+// Initialize camera list on page load
+getCameras();
+
+// ============ UPLOAD TAB ============
+const uploadArea = document.getElementById('uploadArea');
+const fileInput = document.getElementById('fileInput');
+const fileInfo = document.getElementById('fileInfo');
+const fileName = document.getElementById('fileName');
+const fpsSlider = document.getElementById('fpsSlider');
+const fpsValue = document.getElementById('fpsValue');
+const widthSlider = document.getElementById('widthSlider');
+const widthValue = document.getElementById('widthValue');
+const convertBtn = document.getElementById('convertBtn');
+const status = document.getElementById('status');
+const progressBar = document.getElementById('progressBar');
+const progressFill = document.getElementById('progressFill');
+const previewContainer = document.getElementById('previewContainer');
+const gifPreview = document.getElementById('gifPreview');
+const downloadLink = document.getElementById('downloadLink');
+
+let selectedFile = null;
+
+// Upload area click handler
+uploadArea.addEventListener('click', () => fileInput.click());
+
+// Drag and drop handlers
+uploadArea.addEventListener('dragover', (e) => {
+    e.preventDefault();
+    uploadArea.classList.add('dragover');
+});
+
+uploadArea.addEventListener('dragleave', () => {
+    uploadArea.classList.remove('dragover');
+});
+
+uploadArea.addEventListener('drop', (e) => {
+    e.preventDefault();
+    uploadArea.classList.remove('dragover');
+    const files = e.dataTransfer.files;
+    if (files.length > 0 && files[0].type.startsWith('video/')) {
+        handleFileSelect(files[0]);
+    }
+});
+
+// File input change handler
+fileInput.addEventListener('change', (e) => {
+    if (e.target.files.length > 0) {
+        handleFileSelect(e.target.files[0]);
+    }
+});
+
+function handleFileSelect(file) {
+    selectedFile = file;
+    fileName.textContent = file.name;
+    fileInfo.style.display = 'block';
+    convertBtn.disabled = false;
+    previewContainer.style.display = 'none';
+    status.className = 'status';
+    status.style.display = 'none';
+}
+
+// Slider handlers
+fpsSlider.addEventListener('input', () => {
+    fpsValue.textContent = fpsSlider.value;
+});
+
+widthSlider.addEventListener('input', () => {
+    widthValue.textContent = widthSlider.value;
+});
+
+// Convert button handler
+convertBtn.addEventListener('click', async () => {
+    if (!selectedFile) return;
+
+    convertBtn.disabled = true;
+    status.className = 'status info';
+    status.textContent = 'Uploading and converting...';
+    progressBar.style.display = 'block';
+    progressFill.style.width = '30%';
+    previewContainer.style.display = 'none';
+
+    const formData = new FormData();
+    formData.append('file', selectedFile);
+    formData.append('fps', fpsSlider.value);
+    formData.append('width', widthSlider.value);
+
+    try {
+        progressFill.style.width = '60%';
+
+        const response = await fetch('/api/convert', {
+            method: 'POST',
+            body: formData
+        });
+
+        progressFill.style.width = '90%';
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Conversion failed');
+        }
+
+        const { job_id } = await response.json();
+        status.textContent = 'Converting to GIF...';
+        const result = await waitForJob(job_id);
+        progressFill.style.width = '100%';
+
+        status.className = 'status success';
+        status.textContent = `GIF created successfully! Size: ${result.file_size}`;
+
+        // Show preview and download link
+        gifPreview.src = `/api/download/${result.filename}`;
+        downloadLink.href = `/api/download/${result.filename}`;
+        downloadLink.download = result.filename;
+        previewContainer.style.display = 'block';
+
+    } catch (error) {
+        status.className = 'status error';
+        status.textContent = `Error: ${error.message}`;
+    } finally {
+        convertBtn.disabled = false;
+        setTimeout(() => {
+            progressBar.style.display = 'none';
+            progressFill.style.width = '0%';
+        }, 1000);
+    }
+});
+
+// Cleanup on page unload
+window.addEventListener('beforeunload', () => {
+    if (mediaStream) {
+        mediaStream.getTracks().forEach(track => track.stop());
+    }
+});